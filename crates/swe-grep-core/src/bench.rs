@@ -44,16 +44,21 @@ pub async fn run(args: BenchArgs) -> Result<()> {
     for scenario in scenarios {
         let repo_root = resolve_path(&cwd, &scenario.path).await?;
         let mut latencies = Vec::<f64>::new();
+        let mut cpu_times = Vec::<f64>::new();
         let mut hits = 0usize;
         let mut latest_top_hits = Vec::new();
 
         for _ in 0..iterations {
             let search_args = build_search_args(&repo_root, &scenario, &args);
+            let cpu_before = cpu_time_ms();
             let start = Instant::now();
             let summary = search::execute(search_args).await?;
             let elapsed = start.elapsed();
 
             latencies.push(elapsed.as_secs_f64() * 1000.0);
+            if let (Some(before), Some(after)) = (cpu_before, cpu_time_ms()) {
+                cpu_times.push(after - before);
+            }
             total_elapsed += elapsed;
             total_iterations += 1;
 
@@ -71,6 +76,21 @@ pub async fn run(args: BenchArgs) -> Result<()> {
         } else {
             latencies.iter().copied().sum::<f64>() / latencies.len() as f64
         };
+        let stdev_latency_ms = if latencies.len() < 2 {
+            0.0
+        } else {
+            let variance = latencies
+                .iter()
+                .map(|latency| (latency - mean_latency_ms).powi(2))
+                .sum::<f64>()
+                / (latencies.len() - 1) as f64;
+            variance.sqrt()
+        };
+        let mean_cpu_ms = if cpu_times.is_empty() {
+            None
+        } else {
+            Some(cpu_times.iter().copied().sum::<f64>() / cpu_times.len() as f64)
+        };
         let success_rate = if latencies.is_empty() {
             0.0
         } else {
@@ -87,6 +107,8 @@ pub async fn run(args: BenchArgs) -> Result<()> {
             symbol: scenario.symbol.clone(),
             iterations: latencies.len(),
             mean_latency_ms,
+            stdev_latency_ms,
+            mean_cpu_ms,
             throughput_qps,
             success_rate,
             hits,
@@ -223,6 +245,31 @@ fn path_matches(hit_path: &str, expected: &str) -> bool {
     hit == expected_path || hit.ends_with(expected_path)
 }
 
+/// User + system CPU time used so far by this process and its reaped
+/// children, in milliseconds. Iterations run one at a time, so the delta
+/// around `search::execute` is that search's CPU cost.
+#[cfg(unix)]
+fn cpu_time_ms() -> Option<f64> {
+    fn rusage_ms(who: libc::c_int) -> Option<f64> {
+        let mut usage = std::mem::MaybeUninit::<libc::rusage>::uninit();
+        // SAFETY: getrusage only writes to the struct it is given.
+        if unsafe { libc::getrusage(who, usage.as_mut_ptr()) } != 0 {
+            return None;
+        }
+        // SAFETY: getrusage returned 0, so the struct is initialised.
+        let usage = unsafe { usage.assume_init() };
+        let ms = |tv: libc::timeval| tv.tv_sec as f64 * 1000.0 + tv.tv_usec as f64 / 1000.0;
+        Some(ms(usage.ru_utime) + ms(usage.ru_stime))
+    }
+
+    Some(rusage_ms(libc::RUSAGE_SELF)? + rusage_ms(libc::RUSAGE_CHILDREN)?)
+}
+
+#[cfg(not(unix))]
+fn cpu_time_ms() -> Option<f64> {
+    None
+}
+
 #[derive(Clone, Deserialize, Serialize)]
 struct Scenario {
     name: String,
@@ -271,6 +318,12 @@ struct ScenarioReport {
     symbol: String,
     iterations: usize,
     mean_latency_ms: f64,
+    /// Sample standard deviation of the per-iteration latencies.
+    stdev_latency_ms: f64,
+    /// Mean user + system CPU time per iteration, including the rg/fd
+    /// helpers the search spawns. Only recorded on Unix.
+    #[serde(skip_serializing_if = "Option::is_none")]
+    mean_cpu_ms: Option<f64>,
     throughput_qps: f64,
     success_rate: f64,
     hits: usize,
@@ -0,0 +1,295 @@
+"""Helpers shared by the swe-grep benchmark scripts.
+
+The benchmark scripts are run directly (``python scripts/<name>.py``), so this
+module is imported as a sibling rather than as part of a package.
+"""
+
+import http.client
+import json
+import math
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Sequence, Tuple, Union
+
+try:
+    import numpy as np
+except ImportError:  # numpy is optional; fall back to the statistics module
+    np = None
+
+try:
+    import orjson
+except ImportError:  # orjson is optional; fall back to the json module
+    orjson = None
+
+
+def loads(data: Union[bytes, bytearray, str]) -> object:
+    """Decode a JSON document, preferring orjson when it is installed.
+
+    Only decoding goes through orjson: its encoder formats floats and
+    non-ASCII text differently from ``json.dumps``, so the files the scripts
+    write are always produced by the json module.
+    """
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def p95(values: Sequence[float]) -> float:
+    """Nearest-rank 95th percentile.
+
+    Only one order statistic is needed, so numpy selects it with
+    ``np.partition`` (introselect) instead of sorting the whole series. For
+    fewer than 20 values this is the maximum.
+    """
+    k = max(0, math.ceil(0.95 * len(values)) - 1)
+    if np is not None:
+        return float(np.partition(np.asarray(values, dtype=np.float64), k)[k])
+    return float(sorted(values)[k])
+
+
+def aggregate(values: Sequence[float]) -> Dict[str, float]:
+    """Summarise a latency series (ms).
+
+    Besides run count, mean, min, max and p95 this reports the sample
+    standard deviation, the median absolute deviation and the half-width of a
+    normal-approximation 95% confidence interval for the mean, so consumers
+    can tell a real shift from run-to-run noise.
+    """
+    if len(values) == 0:
+        return {
+            "runs": 0,
+            "mean_ms": 0.0,
+            "min_ms": 0.0,
+            "max_ms": 0.0,
+            "p95_ms": 0.0,
+            "stdev_ms": 0.0,
+            "mad_ms": 0.0,
+            "ci95_ms": 0.0,
+        }
+    if np is not None:
+        arr = np.asarray(values, dtype=np.float64)
+        median = np.median(arr)
+        summary = {
+            "runs": len(arr),
+            "mean_ms": float(arr.mean()),
+            "min_ms": float(arr.min()),
+            "max_ms": float(arr.max()),
+            "p95_ms": p95(arr),
+            "stdev_ms": float(arr.std(ddof=1)) if len(arr) > 1 else 0.0,
+            "mad_ms": float(np.median(np.abs(arr - median))),
+        }
+    else:
+        median = statistics.median(values)
+        summary = {
+            "runs": len(values),
+            "mean_ms": statistics.mean(values),
+            "min_ms": min(values),
+            "max_ms": max(values),
+            "p95_ms": p95(values),
+            "stdev_ms": statistics.stdev(values) if len(values) > 1 else 0.0,
+            "mad_ms": statistics.median(abs(value - median) for value in values),
+        }
+    summary["ci95_ms"] = 1.96 * summary["stdev_ms"] / math.sqrt(summary["runs"])
+    return summary
+
+
+def aggregate_many(series: Dict[str, Sequence[float]]) -> Dict[str, Dict[str, float]]:
+    """Apply :func:`aggregate` to every series in ``series``.
+
+    With numpy, series of equal length are stacked into one K x R matrix and
+    reduced along each row, so K keys cost a handful of C calls rather than K
+    separate passes. swe-grep leaves zero-valued stats out of its summary, so
+    a key missing from some runs has a shorter series and forms its own group.
+    """
+    if np is None:
+        return {key: aggregate(values) for key, values in series.items()}
+
+    by_length: Dict[int, List[str]] = {}
+    for key, values in series.items():
+        by_length.setdefault(len(values), []).append(key)
+
+    summaries: Dict[str, Dict[str, float]] = {}
+    for length, keys in by_length.items():
+        if length == 0:
+            for key in keys:
+                summaries[key] = aggregate(())
+            continue
+        mat = np.array([series[key] for key in keys], dtype=np.float64)
+        k = max(0, math.ceil(0.95 * length) - 1)
+        medians = np.median(mat, axis=1)
+        stdevs = mat.std(axis=1, ddof=1) if length > 1 else np.zeros(len(keys))
+        columns = {
+            "mean_ms": mat.mean(axis=1),
+            "min_ms": mat.min(axis=1),
+            "max_ms": mat.max(axis=1),
+            "p95_ms": np.partition(mat, k, axis=1)[:, k],
+            "stdev_ms": stdevs,
+            "mad_ms": np.median(np.abs(mat - medians[:, None]), axis=1),
+            "ci95_ms": 1.96 * stdevs / math.sqrt(length),
+        }
+        for row, key in enumerate(keys):
+            summary: Dict[str, float] = {"runs": length}
+            for name, column in columns.items():
+                summary[name] = float(column[row])
+            summaries[key] = summary
+    # Preserve the caller's key order.
+    return {key: summaries[key] for key in series}
+
+
+def cpu_time_ms(usage) -> float:
+    """User plus system CPU time of a ``resource.struct_rusage``, in ms."""
+    return (usage.ru_utime + usage.ru_stime) * 1000.0
+
+
+def max_rss_kb(usage) -> int:
+    """Peak resident set size of a ``resource.struct_rusage``, in KiB."""
+    # Linux reports ru_maxrss in KiB, macOS in bytes.
+    if sys.platform == "darwin":
+        return usage.ru_maxrss // 1024
+    return usage.ru_maxrss
+
+
+def reap(proc: subprocess.Popen) -> Tuple[int, object]:
+    """Reap ``proc`` with ``os.wait4`` and return ``(returncode, rusage)``.
+
+    wait4 hands back the child's rusage with its exit status, so CPU time and
+    peak RSS come with the wall-clock number. ``proc.returncode`` is set too,
+    so Popen never tries to reap the child a second time.
+    """
+    _, status, usage = os.wait4(proc.pid, 0)
+    proc.returncode = os.waitstatus_to_exitcode(status)
+    return proc.returncode, usage
+
+
+# Opt-in wrapper that runs the benchmarked command under SCHED_FIFO priority 50.
+REALTIME_PREFIX = ["chrt", "-f", "50"]
+
+
+def pin_to_cpu(cpu: int) -> None:
+    """Pin this process to ``cpu``.
+
+    The affinity mask is inherited across fork/exec, so every child spawned
+    afterwards runs on the same CPU without a ``preexec_fn`` (which would
+    also stop subprocess from using its posix_spawn fast path).
+    """
+    if not hasattr(os, "sched_setaffinity"):
+        raise OSError("CPU pinning requires os.sched_setaffinity (Linux only)")
+    os.sched_setaffinity(0, {cpu})
+
+
+def drop_page_caches() -> None:
+    """Flush dirty pages and drop the page, dentry and inode caches (needs root)."""
+    os.sync()
+    tee = ["tee", "/proc/sys/vm/drop_caches"]
+    subprocess.run(
+        tee if os.geteuid() == 0 else ["sudo", *tee],
+        input=b"3\n",
+        stdout=subprocess.DEVNULL,
+        check=True,
+    )
+
+
+def _free_port() -> int:
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+class SearchServer:
+    """A long-lived ``swe-grep serve`` process queried over its HTTP API.
+
+    Spawning the server once and reusing a keep-alive connection removes the
+    per-iteration fork/exec and process start-up cost from the measurements,
+    leaving only the search itself inside the timing window.
+    """
+
+    def __init__(
+        self,
+        swegrep_bin: Path,
+        repo: Path,
+        startup_timeout_secs: float = 30.0,
+        launcher: Sequence[str] = (),
+    ):
+        http_port = _free_port()
+        grpc_port = _free_port()
+        self.command = [
+            *launcher,
+            str(swegrep_bin),
+            "serve",
+            "--path",
+            str(repo),
+            "--http-addr",
+            f"127.0.0.1:{http_port}",
+            "--grpc-addr",
+            f"127.0.0.1:{grpc_port}",
+        ]
+        self.proc = subprocess.Popen(
+            self.command, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+        )
+        self.conn = http.client.HTTPConnection("127.0.0.1", http_port)
+        try:
+            self._wait_until_ready(startup_timeout_secs)
+        except BaseException:
+            self.close()
+            raise
+
+    def _wait_until_ready(self, timeout_secs: float) -> None:
+        deadline = time.monotonic() + timeout_secs
+        while True:
+            if self.proc.poll() is not None:
+                raise RuntimeError(
+                    f"Command {' '.join(self.command)} exited with code {self.proc.returncode}"
+                )
+            try:
+                self.conn.request("GET", "/healthz")
+                response = self.conn.getresponse()
+                response.read()
+                if response.status == 200:
+                    return
+            except (ConnectionError, http.client.HTTPException):
+                self.conn.close()
+            if time.monotonic() > deadline:
+                raise RuntimeError(f"swe-grep server did not become ready within {timeout_secs}s")
+            time.sleep(0.05)
+
+    def search(self, request: Dict[str, object]) -> Tuple[int, bytes, float, float]:
+        """Issue one ``POST /search``.
+
+        Returns ``(status, body, first_output_ms, duration_ms)`` where
+        ``first_output_ms`` is the time until the response headers arrived.
+        """
+        payload = json.dumps(request).encode()
+        headers = {"Content-Type": "application/json"}
+        start = time.perf_counter()
+        self.conn.request("POST", "/search", body=payload, headers=headers)
+        response = self.conn.getresponse()
+        first_output = time.perf_counter()
+        body = response.read()
+        end = time.perf_counter()
+        return (
+            response.status,
+            body,
+            (first_output - start) * 1000.0,
+            (end - start) * 1000.0,
+        )
+
+    def close(self) -> None:
+        self.conn.close()
+        if self.proc.poll() is None:
+            self.proc.terminate()
+            try:
+                self.proc.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                self.proc.kill()
+                self.proc.wait()
+
+    def __enter__(self) -> "SearchServer":
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
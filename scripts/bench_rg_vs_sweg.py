@@ -1,59 +1,229 @@
 #!/usr/bin/env python3
 import argparse
 import json
-import statistics
+import os
+import shutil
 import subprocess
+import tempfile
 import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+from functools import partial
 from pathlib import Path
 
+from bench_common import (
+    REALTIME_PREFIX,
+    SearchServer,
+    aggregate,
+    cpu_time_ms,
+    max_rss_kb,
+    pin_to_cpu,
+    reap,
+)
+
 DEFAULT_RUNS = 10
+DEFAULT_WARMUP = 2
+
+
+def default_workers():
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:  # sched_getaffinity is Linux-only
+        return os.cpu_count() or 1
+
+def run_once(cmd, capture=False):
+    # Output is discarded by default so draining pipes never lands in the
+    # timing window; --capture keeps stderr in a temporary file (no pipe to
+    # drain either) to report it on failures.
+    with tempfile.TemporaryFile() if capture else nullcontext(subprocess.DEVNULL) as stderr:
+        start = time.perf_counter()
+        # Python creates descriptors non-inheritable, so close_fds=False leaks
+        # nothing to the child. Together with an absolute argv[0], no cwd and no
+        # preexec_fn it lets subprocess launch via posix_spawn instead of fork+exec.
+        proc = subprocess.Popen(cmd, stdout=subprocess.DEVNULL, stderr=stderr, close_fds=False)
+        code, usage = reap(proc)
+        duration_ms = (time.perf_counter() - start) * 1000
+        detail = ""
+        if capture:
+            stderr.seek(0)
+            detail = stderr.read().decode(errors="replace")
+    return code, duration_ms, usage, detail
+
+def resolve_command(cmd):
+    """Return ``cmd`` with its program resolved to an absolute path once, up front."""
+    program = shutil.which(cmd[0])
+    if program is None:
+        if os.path.dirname(cmd[0]):
+            raise RuntimeError(f"{Path(cmd[0]).name} binary not found at {Path(cmd[0]).resolve()}")
+        raise RuntimeError(f"{cmd[0]} not found on PATH")
+    return [str(Path(program).resolve()), *cmd[1:]]
+
+def run_server_once(server, request):
+    status, body, _, duration_ms = server.search(request)
+    if status == 200:
+        return 0, duration_ms, None, ""
+    return status, duration_ms, None, body.decode(errors="replace")
 
+def check_result(label, code, detail):
+    if code != 0:
+        message = f"{label} failed with code {code}"
+        if detail:
+            message += f":\n{detail}"
+        raise RuntimeError(message)
 
-def run_once(cmd, cwd):
-    start = time.perf_counter()
-    completed = subprocess.run(cmd, cwd=cwd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-    duration_ms = (time.perf_counter() - start) * 1000
-    return completed.returncode, duration_ms
+def measure_tool(run, label, runs, parallel=1, warmup=0):
+    # Warmup iterations prime the page cache (and swe-grep's on-disk caches)
+    # and are discarded, so the first timed run is as warm as the rest.
+    for _ in range(warmup):
+        code, _, _, detail = run()
+        check_result(label, code, detail)
+
+    if parallel > 1:
+        # Workers only block on the child process, so threads are enough to
+        # keep `parallel` invocations in flight at once.
+        with ThreadPoolExecutor(max_workers=parallel) as pool:
+            results = list(pool.map(lambda _: run(), range(runs)))
+    else:
+        results = [run() for _ in range(runs)]
 
-def measure_tool(cmd, cwd, runs):
     times = []
-    for _ in range(runs):
-        code, duration = run_once(cmd, cwd)
-        if code != 0:
-            raise RuntimeError(f"Command {' '.join(cmd)} failed with code {code}")
+    cpu_times = []
+    peak_rss_kb = 0
+    for code, duration, usage, detail in results:
+        check_result(label, code, detail)
         times.append(duration)
-    return {
-        "runs": runs,
-        "times_ms": times,
-        "mean_ms": statistics.mean(times),
-        "p95_ms": statistics.quantiles(times, n=20)[18] if runs >= 20 else max(times),
-        "min_ms": min(times),
-        "max_ms": max(times),
-    }
+        if usage is not None:
+            cpu_times.append(cpu_time_ms(usage))
+            peak_rss_kb = max(peak_rss_kb, max_rss_kb(usage))
+    summary = {"times_ms": times, **aggregate(times)}
+    # CPU time separates "swe-grep got slower" from "the host was busy or
+    # throttled"; it is only known for forked runs, not --server-mode.
+    if cpu_times:
+        summary["cpu_times_ms"] = cpu_times
+        summary["cpu_ms"] = aggregate(cpu_times)
+        summary["max_rss_kb"] = peak_rss_kb
+    return summary
 
-def run_benchmark(repo, symbol, swegrep_bin, runs):
+def run_benchmark(
+    repo,
+    symbol,
+    swegrep_bin,
+    runs,
+    parallel=1,
+    server_mode=False,
+    capture=False,
+    launcher=(),
+    warmup=DEFAULT_WARMUP,
+):
     repo_path = Path(repo).resolve()
-    sweg_cmd = [str(swegrep_bin), "search", "--symbol", symbol, "--path", str(repo_path)]
-    rg_cmd = ["rg", symbol]
+    # The launcher and each tool are resolved separately, so neither subprocess
+    # nor a launcher such as chrt searches PATH per exec, and a missing tool
+    # fails here rather than as a launcher exit code on the first run.
+    launcher = resolve_command(launcher) if launcher else []
+    # rg gets the repository as an argument rather than as its cwd, which would
+    # force subprocess back onto fork+exec.
+    rg_cmd = [*launcher, *resolve_command(["rg", symbol, str(repo_path)])]
+    sweg_cmd = [
+        *launcher,
+        *resolve_command(
+            [str(swegrep_bin), "search", "--symbol", symbol, "--path", str(repo_path)]
+        ),
+    ]
+    rg_run = partial(run_once, rg_cmd, capture)
 
-    return {
+    result = {
         "symbol": symbol,
         "repository": str(repo_path),
         "runs": runs,
-        "rg": measure_tool(rg_cmd, repo_path, runs),
-        "swe_grep": measure_tool(sweg_cmd, Path.cwd(), runs),
+        "warmup": warmup,
+        "parallel": parallel,
+        "server_mode": server_mode,
+        "rg": measure_tool(rg_run, f"Command {' '.join(rg_cmd)}", runs, parallel, warmup),
     }
+    if server_mode:
+        with SearchServer(swegrep_bin, repo_path, launcher=launcher) as server:
+            request = {"symbol": symbol, "root": str(repo_path)}
+            result["swe_grep"] = measure_tool(
+                partial(run_server_once, server, request),
+                f"POST /search for {symbol}",
+                runs,
+                warmup=warmup,
+            )
+    else:
+        sweg_run = partial(run_once, sweg_cmd, capture)
+        result["swe_grep"] = measure_tool(
+            sweg_run, f"Command {' '.join(sweg_cmd)}", runs, parallel, warmup
+        )
+    return result
 
 def main():
     parser = argparse.ArgumentParser(description="Benchmark swe-grep vs rg")
     parser.add_argument("--repo", required=True, help="Repository root to search")
     parser.add_argument("--symbol", required=True, help="Symbol to search")
     parser.add_argument("--runs", type=int, default=DEFAULT_RUNS, help="Number of warm runs")
+    parser.add_argument(
+        "--warmup",
+        type=int,
+        default=DEFAULT_WARMUP,
+        help=f"Untimed iterations to run before measuring each tool (default: {DEFAULT_WARMUP})",
+    )
     parser.add_argument("--swegrep-bin", default="target/debug/swe-grep", help="Path to swe-grep binary")
+    parser.add_argument(
+        "--parallel",
+        type=int,
+        nargs="?",
+        const=default_workers(),
+        default=1,
+        help="Run up to N iterations concurrently (default: 1; bare flag uses all available CPUs)",
+    )
+    parser.add_argument(
+        "--server-mode",
+        action="store_true",
+        help="Query one long-lived `swe-grep serve` process over HTTP instead of forking per run",
+    )
+    parser.add_argument(
+        "--capture",
+        action="store_true",
+        help="Keep child stderr instead of discarding it, so failures can report it",
+    )
+    parser.add_argument(
+        "--pin-cpu",
+        type=int,
+        metavar="N",
+        help="Pin the benchmark and every child process to CPU N to reduce scheduling noise",
+    )
+    parser.add_argument(
+        "--realtime",
+        action="store_true",
+        help=f"Run each command under `{' '.join(REALTIME_PREFIX)}` (SCHED_FIFO; needs privileges)",
+    )
     parser.add_argument("--output", help="Optional JSON output file")
     args = parser.parse_args()
+    if args.parallel < 1:
+        parser.error("--parallel must be at least 1")
+    if args.warmup < 0:
+        parser.error("--warmup cannot be negative")
+    if args.server_mode and args.parallel > 1:
+        parser.error("--server-mode issues queries over a single connection; drop --parallel")
+    if args.pin_cpu is not None:
+        if args.parallel > 1:
+            parser.error("--pin-cpu runs everything on one CPU; drop --parallel")
+        try:
+            pin_to_cpu(args.pin_cpu)
+        except OSError as exc:
+            parser.error(f"cannot pin to CPU {args.pin_cpu}: {exc}")
 
-    result = run_benchmark(args.repo, args.symbol, Path(args.swegrep_bin), args.runs)
+    result = run_benchmark(
+        args.repo,
+        args.symbol,
+        Path(args.swegrep_bin),
+        args.runs,
+        args.parallel,
+        args.server_mode,
+        args.capture,
+        REALTIME_PREFIX if args.realtime else (),
+        args.warmup,
+    )
     output = json.dumps(result, indent=2)
     if args.output:
         Path(args.output).write_text(output)
@@ -8,29 +8,37 @@ track cold-start regressions alongside the existing throughput/latency suites.
 
 import argparse
 import json
-import statistics
+import os
+import resource
+import selectors
 import subprocess
 import sys
 import time
-from collections import defaultdict
 from pathlib import Path
 from typing import Dict, List, Optional
 
+from bench_common import (
+    REALTIME_PREFIX,
+    SearchServer,
+    aggregate,
+    aggregate_many,
+    cpu_time_ms,
+    drop_page_caches,
+    loads,
+    max_rss_kb,
+    pin_to_cpu,
+    reap,
+)
 
-def _aggregate(values: List[float]) -> Dict[str, float]:
-    if not values:
-        return {"runs": 0, "mean_ms": 0.0, "min_ms": 0.0, "max_ms": 0.0, "p95_ms": 0.0}
-    summary = {
-        "runs": len(values),
-        "mean_ms": statistics.mean(values),
-        "min_ms": min(values),
-        "max_ms": max(values),
-    }
-    if len(values) >= 20:
-        summary["p95_ms"] = statistics.quantiles(values, n=20)[18]
-    else:
-        summary["p95_ms"] = max(values)
-    return summary
+_READ_SIZE = 65536
+_SUMMARY_MARKER = b'{\n  "cycle"'
+
+
+def _describe(stdout: bytes, stderr: bytes) -> str:
+    return (
+        f"STDERR:\n{stderr.decode(errors='replace')}\n"
+        f"STDOUT:\n{stdout.decode(errors='replace')}"
+    )
 
 
 def _run_once(cmd: List[str], cwd: Path) -> Dict[str, object]:
@@ -40,60 +48,91 @@ def _run_once(cmd: List[str], cwd: Path) -> Dict[str, object]:
         cwd=cwd,
         stdout=subprocess.PIPE,
         stderr=subprocess.PIPE,
-        text=True,
     )
 
-    stdout_lines: List[str] = []
+    assert proc.stdout is not None and proc.stderr is not None  # for type checkers
+    stdout_fd = proc.stdout.fileno()
+    stderr_fd = proc.stderr.fileno()
+    buffers = {stdout_fd: bytearray(), stderr_fd: bytearray()}
     first_output: Optional[float] = None
 
-    assert proc.stdout is not None  # for type checkers
-    while True:
-        line = proc.stdout.readline()
-        if line:
-            if first_output is None:
-                first_output = time.perf_counter()
-            stdout_lines.append(line)
-        else:
-            break
-
-    raw_stdout = "".join(stdout_lines)
-    stderr = "" if proc.stderr is None else proc.stderr.read()
-    rc = proc.wait()
+    # Drain both pipes as data arrives so a chatty stderr can never fill its
+    # pipe and stall the child while we are still reading stdout.
+    with selectors.DefaultSelector() as selector:
+        selector.register(proc.stdout, selectors.EVENT_READ)
+        selector.register(proc.stderr, selectors.EVENT_READ)
+        while selector.get_map():
+            for key, _ in selector.select():
+                chunk = os.read(key.fd, _READ_SIZE)
+                if not chunk:
+                    selector.unregister(key.fileobj)
+                    continue
+                if first_output is None and key.fd == stdout_fd:
+                    first_output = time.perf_counter()
+                buffers[key.fd] += chunk
+    proc.stdout.close()
+    proc.stderr.close()
+
+    rc, usage = reap(proc)
     duration_ms = (time.perf_counter() - start) * 1000.0
     first_output_ms = (
         (first_output - start) * 1000.0 if first_output is not None else duration_ms
     )
+    raw_stdout = buffers[stdout_fd]
+    stderr = buffers[stderr_fd]
 
     if rc != 0:
         raise RuntimeError(
-            f"Command {' '.join(cmd)} failed with code {rc}:\nSTDERR:\n{stderr}\nSTDOUT:\n{raw_stdout}"
+            f"Command {' '.join(cmd)} failed with code {rc}:\n{_describe(raw_stdout, stderr)}"
         )
 
-    summary_start: Optional[int] = None
-    for idx, line in enumerate(stdout_lines):
-        if '"cycle"' in line:
-            summary_start = max(0, idx - 1)
-            break
-
-    if summary_start is None:
+    # Tracing events are single-line JSON, so the pretty-printed summary is the
+    # only place an object opens on its own line with an indented "cycle" key.
+    summary_start = raw_stdout.rfind(_SUMMARY_MARKER)
+    if summary_start < 0:
         raise RuntimeError(
-            f"No JSON output captured from swe-grep. STDERR:\n{stderr}\nSTDOUT:\n{raw_stdout}"
+            f"No JSON output captured from swe-grep.\n{_describe(raw_stdout, stderr)}"
         )
 
     try:
-        summary_blob = "".join(stdout_lines[summary_start:])
-        summary = json.loads(summary_blob)
+        summary = loads(raw_stdout[summary_start:])
     except json.JSONDecodeError as err:
         raise RuntimeError(
-            f"Failed to parse swe-grep output as JSON: {err}\nOutput:\n{raw_stdout}\nSTDERR:\n{stderr}"
+            f"Failed to parse swe-grep output as JSON: {err}\n{_describe(raw_stdout, stderr)}"
         ) from err
 
+    return _run_record(duration_ms, first_output_ms, summary, usage)
+
+
+def _run_server_once(server: SearchServer, request: Dict[str, object]) -> Dict[str, object]:
+    status, body, first_output_ms, duration_ms = server.search(request)
+    if status != 200:
+        raise RuntimeError(
+            f"POST /search failed with status {status}:\n{body.decode(errors='replace')}"
+        )
+    try:
+        summary = loads(body)["summary"]
+    except (json.JSONDecodeError, KeyError) as err:
+        raise RuntimeError(
+            f"Failed to parse swe-grep server response: {err}\nBody:\n{body.decode(errors='replace')}"
+        ) from err
+    return _run_record(duration_ms, first_output_ms, summary)
+
+
+def _run_record(
+    duration_ms: float,
+    first_output_ms: float,
+    summary: Dict[str, object],
+    usage: Optional[resource.struct_rusage] = None,
+) -> Dict[str, object]:
     stage_stats = summary.get("stage_stats", {})
     startup_stats = summary.get("startup_stats", {}) or {}
 
     return {
         "duration_ms": duration_ms,
         "time_to_first_output_ms": first_output_ms,
+        "cpu_ms": cpu_time_ms(usage) if usage is not None else None,
+        "max_rss_kb": max_rss_kb(usage) if usage is not None else None,
         "stage_stats": stage_stats,
         "startup_stats": startup_stats,
     }
@@ -119,11 +158,45 @@ def main() -> None:
         default=3,
         help="Per-run timeout passed through to swe-grep",
     )
+    parser.add_argument(
+        "--server-mode",
+        action="store_true",
+        help=(
+            "Query one long-lived `swe-grep serve` process over HTTP instead of forking per run; "
+            "measures warm per-query latency rather than cold start"
+        ),
+    )
+    parser.add_argument(
+        "--cold",
+        action="store_true",
+        help="Drop the page cache before every iteration (needs root or sudo)",
+    )
+    parser.add_argument(
+        "--pin-cpu",
+        type=int,
+        metavar="N",
+        help="Pin the benchmark and swe-grep to CPU N to reduce scheduling noise",
+    )
+    parser.add_argument(
+        "--realtime",
+        action="store_true",
+        help=f"Run swe-grep under `{' '.join(REALTIME_PREFIX)}` (SCHED_FIFO; needs privileges)",
+    )
     parser.add_argument(
         "--output",
         help="Optional file to write JSON results to instead of stdout",
     )
     args = parser.parse_args()
+    if args.pin_cpu is not None:
+        if args.realtime:
+            # A SCHED_FIFO child on the same CPU starves the reader loop, which
+            # then timestamps first output only once swe-grep blocks.
+            parser.error("--realtime starves the output reader on the pinned CPU; drop one of the two")
+        try:
+            pin_to_cpu(args.pin_cpu)
+        except OSError as exc:
+            parser.error(f"cannot pin to CPU {args.pin_cpu}: {exc}")
+    launcher = REALTIME_PREFIX if args.realtime else []
 
     repo_path = Path(args.repo).resolve()
     swegrep_bin = Path(args.swegrep_bin).resolve()
@@ -131,6 +204,7 @@ def main() -> None:
         parser.error(f"swe-grep binary not found at {swegrep_bin}")
 
     run_cmd = [
+        *launcher,
         str(swegrep_bin),
         "search",
         "--symbol",
@@ -144,36 +218,72 @@ def main() -> None:
         run_cmd.extend(["--language", args.language])
 
     runs: List[Dict[str, object]] = []
-    for _ in range(max(1, args.runs)):
-        runs.append(_run_once(run_cmd, repo_path))
-
-    duration_stats = _aggregate([run["duration_ms"] for run in runs])
-    first_output_stats = _aggregate([run["time_to_first_output_ms"] for run in runs])
+    command = run_cmd
+    if args.server_mode:
+        request: Dict[str, object] = {
+            "symbol": args.symbol,
+            "root": str(repo_path),
+            "timeout_secs": args.timeout_secs,
+        }
+        if args.language:
+            request["language"] = args.language
+        with SearchServer(swegrep_bin, repo_path, launcher=launcher) as server:
+            command = server.command
+            for _ in range(max(1, args.runs)):
+                if args.cold:
+                    drop_page_caches()
+                runs.append(_run_server_once(server, request))
+    else:
+        for _ in range(max(1, args.runs)):
+            if args.cold:
+                drop_page_caches()
+            runs.append(_run_once(run_cmd, repo_path))
 
-    stage_totals: Dict[str, List[float]] = defaultdict(list)
-    startup_totals: Dict[str, List[float]] = defaultdict(list)
+    # swe-grep omits zero-valued stats from its summary, so the key set can
+    # differ between runs; each series is created the first time its key shows
+    # up and every series is filled in the same pass.
+    stage_totals: Dict[str, List[float]] = {}
+    startup_totals: Dict[str, List[float]] = {}
+    durations: List[float] = []
+    first_outputs: List[float] = []
+    cpu_times: List[float] = []
+    peak_rss_kb = 0
 
     for run in runs:
-        for key, value in run["stage_stats"].items():
-            if isinstance(value, (int, float)):
-                stage_totals[key].append(float(value))
-        for key, value in run["startup_stats"].items():
-            if isinstance(value, (int, float)):
-                startup_totals[key].append(float(value))
+        durations.append(run["duration_ms"])
+        first_outputs.append(run["time_to_first_output_ms"])
+        if run["cpu_ms"] is not None:
+            cpu_times.append(run["cpu_ms"])
+            peak_rss_kb = max(peak_rss_kb, run["max_rss_kb"])
+        for totals, stats in (
+            (stage_totals, run["stage_stats"]),
+            (startup_totals, run["startup_stats"]),
+        ):
+            for key, value in stats.items():
+                if isinstance(value, (int, float)):
+                    totals.setdefault(key, []).append(float(value))
 
-    stage_summary = {key: _aggregate(values) for key, values in stage_totals.items()}
-    startup_summary = {key: _aggregate(values) for key, values in startup_totals.items()}
+    duration_stats = aggregate(durations)
+    first_output_stats = aggregate(first_outputs)
+    stage_summary = aggregate_many(stage_totals)
+    startup_summary = aggregate_many(startup_totals)
 
     result = {
         "symbol": args.symbol,
         "repository": str(repo_path),
         "runs": len(runs),
-        "command": run_cmd,
+        "server_mode": args.server_mode,
+        "cold": args.cold,
+        "command": command,
         "process_duration_ms": duration_stats,
         "time_to_first_output_ms": first_output_stats,
         "stage_stats": stage_summary,
         "startup_stats": startup_summary,
     }
+    if cpu_times:
+        # Only forked runs expose CPU time; max_rss_kb is the worst swe-grep run.
+        result["process_cpu_ms"] = aggregate(cpu_times)
+        result["max_rss_kb"] = peak_rss_kb
 
     payload = json.dumps(result, indent=2)
     if args.output:
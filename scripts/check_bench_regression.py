@@ -3,37 +3,148 @@
 
 Reads the latest entry from docs/benchmark-summary.jsonl (or a custom path)
 and verifies success rates and latency budgets stay within configured bounds.
-Exits with status 1 when a guard fails so CI can catch regressions.
+With --statistical, latency checks use each scenario's confidence interval and
+also compare against the previous entry, so run-to-run noise alone does not
+trip the guard. Exits with status 1 when a guard fails so CI can catch regressions.
 """
 
 import argparse
-import json
+import math
+import mmap
+import os
+import subprocess
 import sys
 from pathlib import Path
 
+from bench_common import loads
 
-def load_latest(summary_path: Path):
+SMOKE_TEST_SCRIPTS = ("bench_rg_vs_sweg.py", "bench_startup.py", "evaluate_bench.py")
+
+
+def load_entries(summary_path: Path, count: int):
+    """Return up to the last ``count`` entries of the summary, oldest first."""
     if not summary_path.exists():
         raise FileNotFoundError(f"summary file not found: {summary_path}")
-    lines = summary_path.read_text().strip().splitlines()
-    if not lines:
+    entries = []
+    with summary_path.open("rb") as handle:
+        if os.fstat(handle.fileno()).st_size > 0:
+            # Walk backwards through a read-only mapping so only the pages
+            # holding the newest lines are faulted in, however long the
+            # history grows.
+            with mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                end = len(mm)
+                while end > 0 and len(entries) < count:
+                    start = mm.rfind(b"\n", 0, end) + 1
+                    line = mm[start:end]
+                    if line.strip():
+                        entries.append(loads(line))
+                    end = start - 1
+    if not entries:
         raise ValueError(f"summary file {summary_path} is empty")
-    return json.loads(lines[-1])
+    entries.reverse()
+    return entries
+
+
+def load_latest(summary_path: Path):
+    return load_entries(summary_path, 1)[-1]
+
+
+def ci95(scenario):
+    """Half-width of the 95% confidence interval for a scenario's mean latency.
 
+    Returns None for summaries written before ``stdev_latency_ms`` existed, and
+    for scenarios with a single iteration: swe-grep bench writes a stdev of 0.0
+    there, which is no evidence of low noise, so they get the plain check.
+    """
+    stdev = scenario.get("stdev_latency_ms")
+    iterations = scenario.get("iterations", 0)
+    if stdev is None or iterations < 2:
+        return None
+    return 1.96 * stdev / math.sqrt(iterations)
 
-def check_scenarios(data, max_latency_ms, min_success):
+
+def check_scenarios(
+    data,
+    max_latency_ms,
+    min_success,
+    baseline=None,
+    statistical=False,
+    ci_scale=1.0,
+    max_cpu_ms=None,
+):
+    get = dict.get
     failures = []
+    append = failures.append
+    # Only the mean and interval of each previous scenario are needed.
+    baseline_scenarios = {}
+    if statistical:
+        for previous in (baseline or {}).get("scenarios", []):
+            previous_interval = ci95(previous)
+            if previous_interval is not None:
+                baseline_scenarios[get(previous, "name", "unknown")] = (
+                    get(previous, "mean_latency_ms", 0.0),
+                    previous_interval,
+                )
     for scenario in data.get("scenarios", []):
-        name = scenario.get("name", "unknown")
-        mean_latency = scenario.get("mean_latency_ms", 0.0)
-        success_rate = scenario.get("success_rate", 0.0)
+        name = get(scenario, "name", "unknown")
+        mean_latency = get(scenario, "mean_latency_ms", 0.0)
+        success_rate = get(scenario, "success_rate", 0.0)
         if success_rate < min_success:
-            failures.append(
-                f"scenario {name}: success_rate {success_rate:.2f} < {min_success:.2f}"
+            append(f"scenario {name}: success_rate {success_rate:.2f} < {min_success:.2f}")
+
+        if max_cpu_ms is not None:
+            cpu = get(scenario, "mean_cpu_ms")
+            if cpu is not None and cpu > max_cpu_ms:
+                append(f"scenario {name}: mean_cpu {cpu:.2f} ms > {max_cpu_ms:.2f} ms")
+
+        interval = ci95(scenario) if statistical else None
+        if interval is None:
+            if mean_latency > max_latency_ms:
+                append(
+                    f"scenario {name}: mean_latency {mean_latency:.2f} ms > {max_latency_ms:.2f} ms"
+                )
+            continue
+
+        # Only fail the budget when the whole confidence interval is above it.
+        if mean_latency - ci_scale * interval > max_latency_ms:
+            append(
+                f"scenario {name}: mean_latency {mean_latency:.2f} ± {interval:.2f} ms "
+                f"> {max_latency_ms:.2f} ms"
+            )
+
+        previous = baseline_scenarios.get(name)
+        if previous is None:
+            continue
+        # Welch-style comparison against the previous summary entry.
+        previous_latency, previous_interval = previous
+        delta = mean_latency - previous_latency
+        noise = ci_scale * math.hypot(interval, previous_interval)
+        if delta > noise:
+            append(
+                f"scenario {name}: mean_latency rose {delta:.2f} ms over the previous run "
+                f"(noise bound {noise:.2f} ms)"
             )
-        if mean_latency > max_latency_ms:
+    return failures
+
+
+def smoke_test_scripts():
+    """Run each sibling benchmark script with --help and report any that fail.
+
+    A script whose entry point never runs (for example a mistyped
+    ``__name__`` guard) prints nothing and is caught here.
+    """
+    failures = []
+    script_dir = Path(__file__).resolve().parent
+    for name in SMOKE_TEST_SCRIPTS:
+        completed = subprocess.run(
+            [sys.executable, str(script_dir / name), "--help"],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            text=True,
+        )
+        if completed.returncode != 0 or "usage:" not in completed.stdout:
             failures.append(
-                f"scenario {name}: mean_latency {mean_latency:.2f} ms > {max_latency_ms:.2f} ms"
+                f"script {name}: `--help` did not print usage (code {completed.returncode})"
             )
     return failures
 
@@ -57,17 +168,65 @@ def main() -> int:
         default=0.99,
         help="Minimum required success rate per scenario (default: 0.99)",
     )
+    parser.add_argument(
+        "--statistical",
+        action="store_true",
+        help=(
+            "Use per-scenario confidence intervals: fail the latency budget only when the "
+            "interval is above it, and fail when the mean rose beyond the combined noise "
+            "of this and the previous summary entry"
+        ),
+    )
+    parser.add_argument(
+        "--ci-scale",
+        type=float,
+        default=1.0,
+        help="Multiplier applied to the 95%% confidence intervals in --statistical mode (default: 1.0)",
+    )
+    parser.add_argument(
+        "--max-cpu-ms",
+        type=float,
+        help=(
+            "Maximum allowed mean CPU time per scenario; unlike wall-clock latency it is "
+            "insensitive to host load and throttling (uses the mean_cpu_ms that swe-grep "
+            "bench records on Unix)"
+        ),
+    )
+    parser.add_argument(
+        "--smoke-test",
+        action="store_true",
+        help="Also check that the other benchmark scripts start and print their usage",
+    )
 
     args = parser.parse_args()
     summary_path = Path(args.summary)
 
     try:
-        latest = load_latest(summary_path)
+        entries = load_entries(summary_path, 2 if args.statistical else 1)
     except (FileNotFoundError, ValueError) as exc:
         print(f"error: {exc}", file=sys.stderr)
         return 1
+    latest = entries[-1]
+    baseline = entries[-2] if len(entries) > 1 else None
 
-    failures = check_scenarios(latest, args.max_latency_ms, args.min_success)
+    failures = check_scenarios(
+        latest,
+        args.max_latency_ms,
+        args.min_success,
+        baseline=baseline,
+        statistical=args.statistical,
+        ci_scale=args.ci_scale,
+        max_cpu_ms=args.max_cpu_ms,
+    )
+    if args.max_cpu_ms is not None and all(
+        scenario.get("mean_cpu_ms") is None for scenario in latest.get("scenarios", [])
+    ):
+        print(
+            "warning: no scenario reports mean_cpu_ms; --max-cpu-ms was not applied",
+            file=sys.stderr,
+        )
+    if args.smoke_test:
+        failures.extend(smoke_test_scripts())
     if failures:
         print("Benchmark regression detected:")
         for failure in failures:
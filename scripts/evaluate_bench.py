@@ -1,8 +1,10 @@
 #!/usr/bin/env python3
 import argparse
-import json
+import sys
 from pathlib import Path
 
+from bench_common import loads
+
 
 def main():
     parser = argparse.ArgumentParser(description="Check swe-grep vs rg benchmark gap")
@@ -10,7 +12,7 @@ def main():
     parser.add_argument("--max-gap-ms", type=float, default=6.0, help="Allowed mean latency gap")
     args = parser.parse_args()
 
-    payload = json.loads(Path(args.input).read_text())
+    payload = loads(Path(args.input).read_bytes())
     rg_mean = payload["rg"]["mean_ms"]
     sweg_mean = payload["swe_grep"]["mean_ms"]
     gap = sweg_mean - rg_mean
@@ -21,6 +23,7 @@ def main():
 
     if gap > args.max_gap_ms:
         raise SystemExit(f"FAIL: swe-grep exceeds allowed gap ({gap:.3f} > {args.max_gap_ms})")
+    return 0
 
-if __name__ == "main":
-    main()
+if __name__ == "__main__":
+    sys.exit(main())